@@ -1,22 +1,102 @@
 from __future__ import annotations
 
+import asyncio
+import os
+import threading
+import time
 import uuid
-from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Dict, Hashable, List, Optional, Tuple, Union
 
+import orjson
 from fastapi import FastAPI, HTTPException, Depends, Header, status, UploadFile, File, Query, BackgroundTasks
-from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, FileResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 
 from learnus_client import LearnUsClient, LearnUsLoginError
+from learnus_parser import find_m3u8_url, parse_video_title, scan_m3u8_source, scan_vod_header
 
-app = FastAPI(title="LearnUs Calendar API")
 
-# Session store now may contain either a LearnUsClient (for normal users) or None (for guest users).
-_SESSIONS: Dict[str, Optional[LearnUsClient]] = {}
+class _ORJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson (C serializer, emits bytes directly)."""
 
-# Course cache {client_id: {course_id: (last_access_time, activities)}}
-_COURSE_CACHE: Dict[int, Dict[int, Tuple[float, List]]] = {}
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+
+app = FastAPI(title="LearnUs Calendar API", default_response_class=_ORJSONResponse)
+
+_MISSING = object()
+
+
+class _TTLCache:
+    """Thread-safe LRU mapping whose entries also expire ``ttl`` seconds after insertion.
+
+    Lookups and inserts are O(1) (``OrderedDict`` keeps recency order); once
+    ``maxsize`` is exceeded the least recently used entry is dropped.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, Tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.pop(key, None)
+        if item is None or item[0] <= time.monotonic():
+            return default
+        return item[1]
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._set(key, value)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def _set(self, key: Hashable, value: Any) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+
+# Session store {token: LearnUsClient} for logged-in users.
+# Bounded so abandoned tokens (no /logout) are eventually evicted.
+_SESSIONS = _TTLCache(maxsize=10_000, ttl=8 * 3600)
+
+# Guest tokens live in their own store: /guest_login needs no credentials, so
+# sharing the LRU would let a burst of guest logins evict real sessions.
+_GUEST_SESSIONS = _TTLCache(maxsize=10_000, ttl=2 * 3600)
+
+# Course activity / course list caches live on each LearnUsClient
+# (client.activities_cache, client.courses_cache), so they are freed together
+# with the session instead of needing a global map keyed by client.
+
+# Upper bound on concurrent course-page fetches to LearnUs across all users
+_LEARNUS_SEM = threading.BoundedSemaphore(int(os.getenv("LEARNUS_MAX_CONCURRENCY", "32")))
+
+# In-flight course fetches {(client, course_id): Future} so that concurrent cache
+# misses for the same course wait on a single upstream request.
+_INFLIGHT: Dict[Tuple[LearnUsClient, int], Future] = {}
+_INFLIGHT_LOCK = threading.Lock()
 
 
 class LoginRequest(BaseModel):
@@ -37,45 +117,76 @@ class GuestLoginResponse(BaseModel):
 # Endpoint for anonymous users to obtain a short-lived session token that can be
 # used for guest-only operations (such as HTML-based video download).  This
 # mirrors the standard /login endpoint but skips credential verification and
-# does NOT attach a LearnUsClient instance to the session store.
+# stores the token in the separate guest store instead of _SESSIONS.
 
 @app.post("/guest_login", response_model=GuestLoginResponse, summary="비회원 로그인")
-def guest_login():
+async def guest_login():
     token = uuid.uuid4().hex
-    # Store a sentinel (None) so that token validation can still succeed while
-    # allowing us to distinguish guest sessions from normal ones.
-    _SESSIONS[token] = None
+    _GUEST_SESSIONS[token] = True
     return {"token": token}
 
 
 # -------------------------------- Utils ---------------------------------
 
 def get_client(x_auth_token: Optional[str] = Header(None)) -> LearnUsClient:
-    if not x_auth_token or x_auth_token not in _SESSIONS:
+    client = _SESSIONS.get(x_auth_token, _MISSING) if x_auth_token else _MISSING
+    if client is _MISSING:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or missing token")
-    return _SESSIONS[x_auth_token]
+    return client
 
 
-def _get_course_activities_cached(client: LearnUsClient, course_id: int, ttl: int = 900):
-    """Return activities from cache if still fresh; otherwise fetch and update cache."""
-    import time
+def _get_course_activities_entry(client: LearnUsClient, course_id: int, ttl: int = 900) -> Tuple[float, List]:
+    """Return the ``(fetched_at, activities)`` cache entry if still fresh; otherwise
+    fetch and update cache.
 
-    cache = _COURSE_CACHE.setdefault(id(client), {})
-    if course_id in cache and time.time() - cache[course_id][0] < ttl:
-        return cache[course_id][1]
+    Concurrent misses for the same course share a single fetch.
+    """
+    cache = client.activities_cache
+    key = (client, course_id)
+    with _INFLIGHT_LOCK:
+        entry = cache.get(course_id)
+        if entry is not None and time.time() - entry[0] < ttl:
+            return entry
+        future = _INFLIGHT.get(key)
+        leader = future is None
+        if leader:
+            future = _INFLIGHT[key] = Future()
+
+    if not leader:
+        return future.result()
 
-    activities = client.get_course_activities(course_id)
-    cache[course_id] = (time.time(), activities)
-    return activities
+    try:
+        with _LEARNUS_SEM:
+            activities = client.get_course_activities(course_id)
+        entry = cache[course_id] = (time.time(), activities)
+        future.set_result(entry)
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _INFLIGHT_LOCK:
+            del _INFLIGHT[key]
+    return entry
+
+
+def _get_courses_cached(client: LearnUsClient, ttl: int = 600) -> List[dict]:
+    """Return the client's course list, fetching it at most once per *ttl* seconds."""
+    entry = client.courses_cache
+    if entry is not None and time.time() - entry[0] < ttl:
+        return entry[1]
+
+    courses = client.get_courses()
+    client.courses_cache = (time.time(), courses)
+    return courses
 
 
 # -------------------------------- Routes --------------------------------
 
 @app.post("/login", response_model=LoginResponse)
-def login(payload: LoginRequest):
+async def login(payload: LoginRequest):
     client = LearnUsClient()
     try:
-        client.login(payload.username, payload.password)
+        await run_in_threadpool(client.login, payload.username, payload.password)
     except LearnUsLoginError:
         raise HTTPException(status_code=400, detail="로그인에 실패했습니다. 학번/비밀번호를 확인해주세요.")
     except Exception:
@@ -86,23 +197,24 @@ def login(payload: LoginRequest):
 
 
 @app.get("/courses")
-def get_courses(client: LearnUsClient = Depends(get_client)):
-    return client.get_courses()
+async def get_courses(client: LearnUsClient = Depends(get_client)):
+    return await run_in_threadpool(_get_courses_cached, client)
 
 
 # Simple health/token validation endpoint
 @app.get("/ping")
-def ping(client: LearnUsClient = Depends(get_client)):
+async def ping(client: LearnUsClient = Depends(get_client)):
     return {"ok": True}
 
 
-# Logout: remove session & cache
+# Logout: remove session (its caches are dropped with the client)
 @app.post("/logout")
-def logout(x_auth_token: Optional[str] = Header(None)):
-    if not x_auth_token or x_auth_token not in _SESSIONS:
+async def logout(x_auth_token: Optional[str] = Header(None)):
+    if not x_auth_token or (
+        _SESSIONS.pop(x_auth_token, _MISSING) is _MISSING
+        and _GUEST_SESSIONS.pop(x_auth_token, _MISSING) is _MISSING
+    ):
         raise HTTPException(status_code=401, detail="Invalid token")
-    client = _SESSIONS.pop(x_auth_token)
-    _COURSE_CACHE.pop(id(client), None)
     return {"ok": True}
 
 
@@ -115,61 +227,97 @@ import pathlib
 
 # -------------------------------- New Video Endpoints --------------------------------
 
-import subprocess, tempfile
-import shlex
+import tempfile
 from urllib.parse import quote
-import shutil, os
+import shutil
 
-@app.get("/videos")
-def list_videos(course_id: int, client: LearnUsClient = Depends(get_client)):
-    """Return list of VOD (video) activities for the given course."""
-    activities = _get_course_activities_cached(client, course_id)
-    videos = [
-        {
-            "id": a.id,
-            "title": a.title,
-            "completed": a.completed,
-            "open": a.open_time.isoformat() if a.open_time else None,
-            "due": a.due_time.isoformat() if a.due_time else None,
-            "available": a.extra.get("playable", True),
-        }
-        for a in activities
-        if a.type == "vod"
-    ]
-    return {"videos": videos}
+# Resolved once at import; PATH lookups stat every directory on each call.
+# ffmpeg is only required by the download routes, which report its absence.
+_FFMPEG_BIN = os.getenv("FFMPEG_PATH") or shutil.which("ffmpeg") or shutil.which("ffmpeg.exe")
+_FFPROBE_BIN = os.getenv("FFPROBE_PATH") or shutil.which("ffprobe") or shutil.which("ffprobe.exe")
 
+# ffmpeg codec arguments, kept as argv fragments so they are never shell-parsed
+_MP4_REMUX_ARGS = ("-c", "copy", "-bsf:a", "aac_adtstoasc", "-movflags", "+faststart")
+_MP3_CODEC_ARGS = ("-vn", "-c:a", "libmp3lame", "-b:a", "192k", "-f", "mp3")
 
-@app.get("/download/{video_id}.{ext}")
-def download_video(video_id: int, ext: str, client: LearnUsClient = Depends(get_client)):
-    """Stream MP4/MP3 conversion of the given video module to the user.
+# Read size for streamed ffmpeg output; close to typical socket send buffers.
+_STREAM_CHUNK_SIZE = 256 * 1024
 
-    ext must be "mp4" or "mp3".
+
+async def _iter_process_stdout(process: asyncio.subprocess.Process):
+    """Yield ffmpeg's stdout in chunks; kill and reap the process when done.
+
+    ffmpeg -> bounded queue -> client.  A slow client blocks queue.put, which
+    stops us draining the pipe, which in turn throttles ffmpeg itself.
     """
-    if ext not in {"mp4", "mp3"}:
-        raise HTTPException(status_code=400, detail="Unsupported extension. Use mp4 or mp3.")
+    queue: asyncio.Queue[Union[bytes, Exception]] = asyncio.Queue(maxsize=4)
 
-    video_page_url = f"{client.BASE_URL}/mod/vod/viewer.php?id={video_id}"
+    async def pump():
+        try:
+            while chunk := await process.stdout.read(_STREAM_CHUNK_SIZE):
+                await queue.put(chunk)
+        except Exception as e:
+            await queue.put(e)  # re-raised below so the response is aborted, not truncated
+            return
+        await queue.put(b"")  # end of stream
+
+    pump_task = asyncio.create_task(pump())
     try:
-        title, m3u8_url = client.get_video_stream_info(video_page_url)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        while True:
+            chunk = await queue.get()
+            if isinstance(chunk, Exception):
+                raise chunk
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        pump_task.cancel()
+        # Also reached when the client disconnects mid-stream
+        if process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+        await process.wait()
+
+
+# ffprobe header cache {m3u8_url: headers}; the same lecture is often fetched
+# repeatedly (MP4 then MP3, or retried downloads).
+_PROBE_CACHE = _TTLCache(maxsize=512, ttl=3600)
+
+
+async def _probe_stream_headers(m3u8_url: str) -> Dict[str, str]:
+    """Return X-Stream-Duration / X-Stream-Bitrate headers for the stream.
+
+    The values are advisory, so a missing ffprobe or any probe error simply yields
+    fewer headers.  Successful probes are cached per URL for an hour.
+    """
+    cached = _PROBE_CACHE.get(m3u8_url)
+    if cached is not None:
+        return cached
 
-    # Probe duration (in seconds) using ffprobe, if available
-    ffprobe_bin = os.getenv("FFPROBE_PATH") or shutil.which("ffprobe") or shutil.which("ffprobe.exe")
     stream_duration: Optional[float] = None
     stream_bitrate: Optional[int] = None  # bits per second
-    if ffprobe_bin:
+    if _FFPROBE_BIN:
         try:
             probe_cmd = [
-                ffprobe_bin,
+                _FFPROBE_BIN,
                 "-v", "error",
                 "-show_entries", "format=duration,bit_rate",
                 "-of", "default=noprint_wrappers=1:nokey=1",
                 m3u8_url,
             ]
-            result = subprocess.run(probe_cmd, capture_output=True, text=True, timeout=10)
-            if result.returncode == 0:
-                lines = [l.strip() for l in result.stdout.splitlines() if l.strip()]
+            probe = await asyncio.create_subprocess_exec(
+                *probe_cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+            )
+            try:
+                probe_out, _ = await asyncio.wait_for(probe.communicate(), timeout=10)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                probe.kill()
+                await probe.wait()
+                raise
+            if probe.returncode == 0:
+                lines = [l.strip() for l in probe_out.decode(errors="ignore").splitlines() if l.strip()]
                 if lines:
                     try:
                         stream_duration = float(lines[0])
@@ -182,20 +330,32 @@ def download_video(video_id: int, ext: str, client: LearnUsClient = Depends(get_
                             pass
         except Exception:
             # ignore probe errors
-            stream_duration = None
-            stream_bitrate = None
+            return {}
 
-    # Prepare ffmpeg command
-    ffmpeg_bin = os.getenv("FFMPEG_PATH") or shutil.which("ffmpeg") or shutil.which("ffmpeg.exe")
-    if not ffmpeg_bin:
-        raise HTTPException(status_code=500, detail="ffmpeg executable not found on server. Install ffmpeg and ensure it is in PATH.")
-
-    filename = f"{title}.{ext}"
-    headers = {"Content-Disposition": f"attachment; filename*=UTF-8''{quote(filename)}"}
+    headers: Dict[str, str] = {}
     if stream_duration:
         headers["X-Stream-Duration"] = str(stream_duration)
     if stream_bitrate:
         headers["X-Stream-Bitrate"] = str(stream_bitrate)
+    if headers:
+        _PROBE_CACHE[m3u8_url] = headers
+    return headers
+
+
+async def _build_stream_response(m3u8_url: str, title: str, ext: str):
+    """Convert the HLS stream at *m3u8_url* with ffmpeg and return the response.
+
+    MP4 is remuxed into a temporary file served with FileResponse; MP3 is
+    transcoded on the fly and streamed.  Shared by /download and /guest/download.
+    """
+    if not _FFMPEG_BIN:
+        raise HTTPException(status_code=500, detail="ffmpeg executable not found on server. Install ffmpeg and ensure it is in PATH.")
+
+    # Probe duration/bitrate while ffmpeg is starting up; only used for headers
+    probe_task = asyncio.create_task(_probe_stream_headers(m3u8_url))
+
+    filename = f"{title}.{ext}"
+    headers = {"Content-Disposition": f"attachment; filename*=UTF-8''{quote(filename)}"}
 
     if ext == "mp4":
         # ------------------------------------------------------------------
@@ -208,18 +368,36 @@ def download_video(video_id: int, ext: str, client: LearnUsClient = Depends(get_
             tmp_path = tmp.name
 
         remux_cmd = [
-            ffmpeg_bin,
+            _FFMPEG_BIN,
             "-loglevel", "error",
             "-y",
             "-i", m3u8_url,
-            "-c", "copy",
-            "-bsf:a", "aac_adtstoasc",
-            "-movflags", "+faststart",
+            *_MP4_REMUX_ARGS,
             tmp_path,
         ]
 
-        result = subprocess.run(remux_cmd, capture_output=True)
-        if result.returncode != 0:
+        # Run the remux on the event loop instead of blocking a worker thread
+        remux = await asyncio.create_subprocess_exec(
+            *remux_cmd, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            await remux.communicate()
+        except BaseException:
+            # Cancelled (client gone, shutdown): don't leave ffmpeg or the file behind
+            if remux.returncode is None:
+                try:
+                    remux.kill()
+                except ProcessLookupError:
+                    pass
+            await remux.wait()
+            probe_task.cancel()
+            try:
+                os.remove(tmp_path)
+            except Exception:
+                pass
+            raise
+        if remux.returncode != 0:
+            probe_task.cancel()
             # Clean up temp file on error
             try:
                 os.remove(tmp_path)
@@ -237,32 +415,126 @@ def download_video(video_id: int, ext: str, client: LearnUsClient = Depends(get_
         background_tasks = BackgroundTasks()
         background_tasks.add_task(_cleanup)
 
+        headers.update(await probe_task)
         return FileResponse(tmp_path, media_type="video/mp4", filename=filename, headers=headers, background=background_tasks)
 
     # -------------------------------- MP3 (streaming) -------------------------------
-    codec_args = "-vn -c:a libmp3lame -b:a 192k -f mp3"
-    cmd = f"{shlex.quote(ffmpeg_bin)} -loglevel error -y -i {shlex.quote(m3u8_url)} {codec_args} pipe:1"
-
-    process = subprocess.Popen(shlex.split(cmd), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    # argv is passed straight to exec, so no shell quoting is needed
+    process = await asyncio.create_subprocess_exec(
+        _FFMPEG_BIN, "-loglevel", "error", "-y", "-i", m3u8_url, *_MP3_CODEC_ARGS, "pipe:1",
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL,
+        # StreamReader buffers up to 2 * limit before pausing the pipe (default 64 KiB)
+        limit=_STREAM_CHUNK_SIZE,
+    )
     if process.stdout is None:
+        probe_task.cancel()
         raise HTTPException(status_code=500, detail="Failed to initiate ffmpeg stream")
 
-    def iterfile():
-        try:
-            while True:
-                chunk = process.stdout.read(1024 * 1024)
-                if not chunk:
-                    break
-                yield chunk
-        finally:
-            process.stdout.close()
-            process.kill()
+    try:
+        headers.update(await probe_task)
+    except BaseException:
+        # ffmpeg is already running; nothing will consume its output now
+        if process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+        await process.wait()
+        raise
+    return StreamingResponse(_iter_process_stdout(process), media_type="audio/mpeg", headers=headers)
+
+
+@app.get("/videos")
+async def list_videos(
+    course_id: int,
+    client: LearnUsClient = Depends(get_client),
+    if_none_match: Optional[str] = Header(None),
+):
+    """Return list of VOD (video) activities for the given course.
 
-    return StreamingResponse(iterfile(), media_type="audio/mpeg", headers=headers)
+    The list only changes when the course page is re-fetched, so the fetch time
+    serves as the ETag and unchanged polls are answered with 304 Not Modified.
+    """
+    # Body and ETag come from the same cache entry, so a concurrent refresh
+    # can never pair an old body with a new validator.
+    fetched_at, activities = await run_in_threadpool(_get_course_activities_entry, client, course_id)
+    etag = f'"{course_id}-{int(fetched_at * 1_000_000):x}"'
+    # Per-user data: keep it out of shared caches and key browser caches by token
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=60", "Vary": "X-Auth-Token"}
+    # If-None-Match uses weak comparison (RFC 9110 13.1.2); proxies that gzip
+    # the body send our ETag back as W/"..."
+    if if_none_match and (
+        if_none_match.strip() == "*"
+        or etag in (t.strip().removeprefix("W/") for t in if_none_match.split(","))
+    ):
+        return Response(status_code=304, headers=headers)
+
+    videos = [
+        {
+            "id": a.id,
+            "title": a.title,
+            "completed": a.completed,
+            "open": a.open_time,
+            "due": a.due_time,
+            "available": a.extra.get("playable", True),
+        }
+        for a in activities
+        if a.type == "vod"
+    ]
+    # Returned directly so orjson serialises the datetimes (ISO 8601) itself,
+    # skipping FastAPI's jsonable_encoder pass over every item.
+    return _ORJSONResponse({"videos": videos}, headers=headers)
+
+
+@app.get("/download/{video_id}.{ext}")
+async def download_video(video_id: int, ext: str, client: LearnUsClient = Depends(get_client)):
+    """Stream MP4/MP3 conversion of the given video module to the user.
+
+    ext must be "mp4" or "mp3".
+    """
+    if ext not in {"mp4", "mp3"}:
+        raise HTTPException(status_code=400, detail="Unsupported extension. Use mp4 or mp3.")
+
+    video_page_url = f"{client.BASE_URL}/mod/vod/viewer.php?id={video_id}"
+    try:
+        title, m3u8_url = await run_in_threadpool(client.get_video_stream_info, video_page_url)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return await _build_stream_response(m3u8_url, title, ext)
 
 
 # --------------------------- Guest download via HTML ---------------------------
 
+_UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+async def _read_video_page(file: UploadFile) -> str:
+    """Read an uploaded video page only as far as its m3u8 <source> tag and title.
+
+    Chunks are scanned as they arrive and reading stops once both the source tag
+    and a complete ``#vod_header`` <h1> have been seen, so the tail of large saved
+    pages (scripts, inline assets) is never loaded into memory.
+    """
+    buf = bytearray()
+    source_seen = header_seen = title_seen = False
+    source_at = header_at = 0  # match offset once seen, else where to resume
+    while True:
+        chunk = await file.read(_UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        buf += chunk
+        if not source_seen:
+            source_seen, source_at = scan_m3u8_source(buf, source_at)
+        if not header_seen:
+            header_seen, header_at = scan_vod_header(buf, header_at)
+        if header_seen and not title_seen:
+            title_seen = buf.find(b"</h1>", header_at) != -1
+        if source_seen and title_seen:
+            break
+    return buf.decode("utf-8", errors="ignore")
+
+
 @app.post("/guest/download")
 async def guest_download(
     ext: str = Query(..., regex="^(mp4|mp3)$", description="Download type: mp4 or mp3"),
@@ -273,146 +545,56 @@ async def guest_download(
     convert/stream it as MP4 or MP3 to the client.
 
     The caller must include the token obtained from /guest_login in the
-    X-Auth-Token header.  The session associated with that token must be a guest
-    session (i.e. value is None).
+    X-Auth-Token header.  The token must belong to a guest session, not a
+    logged-in one.
     """
 
     # Basic token validation (guest only)
-    if not x_auth_token or x_auth_token not in _SESSIONS:
+    if not x_auth_token or x_auth_token not in _GUEST_SESSIONS:
+        if x_auth_token and x_auth_token in _SESSIONS:
+            raise HTTPException(status_code=400, detail="Not a guest session")
         raise HTTPException(status_code=401, detail="Invalid or missing token")
-    if _SESSIONS[x_auth_token] is not None:
-        raise HTTPException(status_code=400, detail="Not a guest session")
 
-    # Read uploaded HTML
+    # Read (the relevant head of) the uploaded HTML and release the spooled upload now
     try:
-        raw = await file.read()
-        html_text = raw.decode("utf-8", errors="ignore")
+        html_text = await _read_video_page(file)
     except Exception:
         raise HTTPException(status_code=400, detail="파일을 읽는 중 오류가 발생했습니다.")
+    finally:
+        await file.close()
 
     # ------------------------------------------------------------------
     # Parse HTML to obtain m3u8 URL & title (mirror get_video_stream_info)
     # ------------------------------------------------------------------
-    from bs4 import BeautifulSoup
-
-    soup = BeautifulSoup(html_text, "html.parser")
-
-    # Find m3u8 source tag
-    source_tag = soup.find("source", {"type": "application/x-mpegURL"})
-    if source_tag is None or not source_tag.get("src"):
+    m3u8_url = find_m3u8_url(html_text)
+    if not m3u8_url:
         raise HTTPException(status_code=400, detail="HTML 내에서 m3u8 <source> 태그를 찾을 수 없습니다.")
 
-    m3u8_url: str = source_tag["src"]
-
-    # Extract and sanitise title
-    title = file.filename.rsplit(".", 1)[0]
-    header_div = soup.find("div", id="vod_header")
-    if header_div is not None and header_div.find("h1") is not None:
-        h1 = header_div.find("h1")
-        for span in h1.find_all("span"):
-            span.decompose()
-        extracted = h1.get_text(strip=True)
-        if extracted:
-            invalid_chars = "\\/:*?\"<>|"
-            title = extracted.translate(str.maketrans(invalid_chars, '＼／：＊？＂＜＞｜'))
-
-    # Probe duration/bitrate using ffprobe if available (reuse logic above)
-    ffprobe_bin = os.getenv("FFPROBE_PATH") or shutil.which("ffprobe") or shutil.which("ffprobe.exe")
-    stream_duration: Optional[float] = None
-    stream_bitrate: Optional[int] = None
-    if ffprobe_bin:
-        try:
-            probe_cmd = [
-                ffprobe_bin,
-                "-v", "error",
-                "-show_entries", "format=duration,bit_rate",
-                "-of", "default=noprint_wrappers=1:nokey=1",
-                m3u8_url,
-            ]
-            result = subprocess.run(probe_cmd, capture_output=True, text=True, timeout=10)
-            if result.returncode == 0:
-                lines = [l.strip() for l in result.stdout.splitlines() if l.strip()]
-                if lines:
-                    try:
-                        stream_duration = float(lines[0])
-                    except ValueError:
-                        pass
-                    if len(lines) > 1:
-                        try:
-                            stream_bitrate = int(lines[1])
-                        except ValueError:
-                            pass
-        except Exception:
-            stream_duration = None
-            stream_bitrate = None
-
-    # ffmpeg command (same as /download)
-    ffmpeg_bin = os.getenv("FFMPEG_PATH") or shutil.which("ffmpeg") or shutil.which("ffmpeg.exe")
-    if not ffmpeg_bin:
-        raise HTTPException(status_code=500, detail="ffmpeg executable not found on server. Install ffmpeg and ensure it is in PATH.")
-
-    filename = f"{title}.{ext}"
-    headers = {"Content-Disposition": f"attachment; filename*=UTF-8''{quote(filename)}"}
-    if stream_duration:
-        headers["X-Stream-Duration"] = str(stream_duration)
-    if stream_bitrate:
-        headers["X-Stream-Bitrate"] = str(stream_bitrate)
-
-    if ext == "mp4":
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as tmp:
-            tmp_path = tmp.name
-
-        remux_cmd = [
-            ffmpeg_bin,
-            "-loglevel", "error",
-            "-y",
-            "-i", m3u8_url,
-            "-c", "copy",
-            "-bsf:a", "aac_adtstoasc",
-            "-movflags", "+faststart",
-            tmp_path,
-        ]
-
-        result = subprocess.run(remux_cmd, capture_output=True)
-        if result.returncode != 0:
-            try:
-                os.remove(tmp_path)
-            except Exception:
-                pass
-            raise HTTPException(status_code=500, detail="ffmpeg failed to remux video")
+    # Extract and sanitise title (fall back to the uploaded file name)
+    title = parse_video_title(html_text) or file.filename.rsplit(".", 1)[0]
 
-        def _cleanup():
-            try:
-                os.remove(tmp_path)
-            except Exception:
-                pass
+    return await _build_stream_response(m3u8_url, title, ext)
 
-        background_tasks = BackgroundTasks()
-        background_tasks.add_task(_cleanup)
 
-        return FileResponse(tmp_path, media_type="video/mp4", filename=filename, headers=headers, background=background_tasks)
+# ----------------------------- Static mount (last) -----------------------------
+# Browser freshness for the frontend, in seconds
+_STATIC_MAX_AGE = 300
 
-    codec_args = "-vn -c:a libmp3lame -b:a 192k -f mp3"
-    cmd = f"{shlex.quote(ffmpeg_bin)} -loglevel error -y -i {shlex.quote(m3u8_url)} {codec_args} pipe:1"
 
-    process = subprocess.Popen(shlex.split(cmd), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    if process.stdout is None:
-        raise HTTPException(status_code=500, detail="Failed to initiate ffmpeg stream")
+class _CachedStaticFiles(StaticFiles):
+    """StaticFiles that also sets Cache-Control.
 
-    def iterfile():
-        try:
-            while True:
-                chunk = process.stdout.read(1024 * 1024)
-                if not chunk:
-                    break
-                yield chunk
-        finally:
-            process.stdout.close()
-            process.kill()
+    The frontend is a single index.html, so repeat loads within a few minutes
+    are served from the browser cache; after that it is revalidated, which
+    Starlette answers with a 304 via ETag, and a deploy shows up within
+    ``_STATIC_MAX_AGE`` seconds.
+    """
 
-    return StreamingResponse(iterfile(), media_type="audio/mpeg", headers=headers)
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        response.headers["Cache-Control"] = f"public, max-age={_STATIC_MAX_AGE}, must-revalidate"
+        return response
 
 
-# ----------------------------- Static mount (last) -----------------------------
 _static_path = pathlib.Path(__file__).parent / "static"
-app.mount("/", StaticFiles(directory=_static_path, html=True), name="static") 
\ No newline at end of file
+app.mount("/", _CachedStaticFiles(directory=_static_path, html=True), name="static") 
\ No newline at end of file
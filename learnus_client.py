@@ -1,15 +1,53 @@
 from __future__ import annotations
 
 import logging
+import re
+from html import unescape
 from typing import Tuple, Optional
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from Crypto.PublicKey import RSA
 from Crypto.Cipher import PKCS1_v1_5
 
+from learnus_parser import find_m3u8_url, parse_video_title, strip_unparsed
+
 logger = logging.getLogger(__name__)
 
+# Connection pool shared by every client's session.  Cookies stay on each
+# requests.Session, so only the TCP/TLS connections to LearnUs and the Yonsei
+# SSO host are reused across logins and users.
+_HTTP_ADAPTER = HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=64,
+    max_retries=Retry(total=2, backoff_factor=0.1),
+)
+
+# Quoted attribute values are skipped whole so a ``>`` inside one doesn't end the tag
+_INPUT_TAG_RE = re.compile(r"""<input\b(?:[^>"']|"[^"]*"|'[^']*')*>""", re.I)
+_TAG_ATTR_RE = re.compile(r"""\s([\w:-]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""")
+
+
+def _inputs(html: str) -> dict[str, str]:
+    """Return ``{name: value}`` for the ``<input>`` tags in an SSO response page.
+
+    The SSO steps only need a handful of hidden-field values from small, fixed
+    pages, so a regex scan is used instead of building a DOM each time.  The
+    first tag wins when a name repeats, matching ``soup.find``; tags inside
+    comments, scripts, styles and textareas are ignored, as the parser does.
+    """
+    values: dict[str, str] = {}
+    for tag in _INPUT_TAG_RE.finditer(strip_unparsed(html)):
+        attrs = {
+            m.group(1).lower(): next(v for v in m.group(2, 3, 4) if v is not None)
+            for m in _TAG_ATTR_RE.finditer(tag.group(0))
+        }
+        name, value = attrs.get("name"), attrs.get("value")
+        if name and value is not None:
+            values.setdefault(name, unescape(value))
+    return values
+
 
 class LearnUsLoginError(Exception):
     """Raised when SSO login to LearnUs fails."""
@@ -30,6 +68,11 @@ class LearnUsClient:
 
     def __init__(self) -> None:
         self.session: Optional[requests.Session] = None
+        # Response caches filled by the web API; they share the client's lifetime.
+        # {course_id: (fetched_at, activities)}
+        self.activities_cache: dict[int, tuple[float, list]] = {}
+        # (fetched_at, courses) or None
+        self.courses_cache: Optional[tuple[float, list[dict]]] = None
 
     # ---------------------------------------------------------------------
     # Public helpers
@@ -44,6 +87,7 @@ class LearnUsClient:
         import requests  # local import to be explicit
 
         session = requests.Session()
+        session.mount("https://", _HTTP_ADAPTER)
         base_headers = {"User-Agent": "Mozilla/5.0"}
 
         def post_request(url: str, headers: dict, data: dict):
@@ -52,19 +96,13 @@ class LearnUsClient:
             return res
 
         def get_value_from_input(res_text: str, input_name: str):
-            soup = BeautifulSoup(res_text, "html.parser")
-            tag = soup.find("input", {"name": input_name})
-            return tag["value"] if tag else None
+            return _inputs(res_text).get(input_name)
 
         def get_multiple_values(res_text: str, names: list[str]):
-            soup = BeautifulSoup(res_text, "html.parser")
-            values = {}
-            for n in names:
-                tag = soup.find("input", {"name": n})
-                if not tag:
-                    return None
-                values[n] = tag["value"]
-            return values
+            inputs = _inputs(res_text)
+            if any(n not in inputs for n in names):
+                return None
+            return {n: inputs[n] for n in names}
 
         # 0) coursemosLogin – obtain S1
         headers = base_headers.copy()
@@ -164,24 +202,16 @@ class LearnUsClient:
         session = self.ensure_logged_in()
         res = session.get(video_page_url)
         res.raise_for_status()
-        soup = BeautifulSoup(res.text, "html.parser")
 
         # Extract m3u8 source URL
-        source_tag = soup.find("source", {"type": "application/x-mpegURL"})
-        if source_tag is None:
+        m3u8_url = find_m3u8_url(res.text)
+        if m3u8_url is None:
             raise LearnUsLoginError("Unable to locate video source tag (application/x-mpegURL)")
-        m3u8_url: str = source_tag["src"]
 
         # Extract & sanitise video title (remove spans and invalid characters)
-        header_div = soup.find("div", id="vod_header")
-        if header_div is None or header_div.find("h1") is None:
+        title = parse_video_title(res.text)
+        if title is None:
             raise LearnUsLoginError("Unable to locate video title on the page")
-        h1 = header_div.find("h1")
-        for span in h1.find_all("span"):
-            span.decompose()
-        title: str = h1.get_text(strip=True)
-        invalid_chars = '\\/:*?"<>|'
-        title = title.translate(str.maketrans(invalid_chars, "＼／：＊？＂＜＞｜"))
 
         return title, m3u8_url
 
@@ -223,19 +253,13 @@ class LearnUsClient:
         return res
 
     def _get_input_value(self, res_text: str, name: str) -> Optional[str]:
-        soup = BeautifulSoup(res_text, "html.parser")
-        tag = soup.find("input", {"name": name})
-        return tag["value"] if tag else None
+        return _inputs(res_text).get(name)
 
     def _get_multiple_input_values(self, res_text: str, names: list[str]) -> Optional[dict[str, str]]:
-        soup = BeautifulSoup(res_text, "html.parser")
-        values = {}
-        for n in names:
-            tag = soup.find("input", {"name": n})
-            if tag is None:
-                return None
-            values[n] = tag["value"]
-        return values
+        inputs = _inputs(res_text)
+        if any(n not in inputs for n in names):
+            return None
+        return {n: inputs[n] for n in names}
 
     # ----- Step helpers --------------------------------------------------
     def _step_0_coursemos(self, username: str, password: str) -> str:
@@ -2,16 +2,30 @@ from __future__ import annotations
 
 import re
 import datetime as dt
+from html import unescape
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from bs4 import BeautifulSoup
 
+try:  # lxml's C parser is several times faster than the pure-Python one
+    import lxml  # noqa: F401
+
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
 __all__ = [
+    "HTML_PARSER",
     "Activity",
     "parse_course_activities",
     "parse_assignment_detail",
     "parse_dashboard_courses",
+    "find_m3u8_url",
+    "parse_video_title",
+    "scan_m3u8_source",
+    "scan_vod_header",
+    "strip_unparsed",
 ]
 
 
@@ -32,6 +46,37 @@ _DATE_RANGE_RE = re.compile(
     r"\s*(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\s*~\s*(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})",
 )
 _LATE_RE = re.compile(r"Late\s*:\s*(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})")
+_TITLE_SUFFIX_RE = re.compile(r"\s*(동영상|과제)$")
+
+# Text an HTML parser never reads as tags: comments and the bodies of raw-text
+# elements.  An unterminated one runs to the end of the input.
+_SKIPPED_PATTERN = r"<!--.*?(?:-->|\Z)|<(script|style|textarea)\b.*?(?:</\1\s*>|\Z)"
+_SOURCE_TAG_PATTERN = r"<source\b[^>]*>"
+_M3U8_TYPE_PATTERN = r"""\stype\s*=\s*["']application/x-mpegURL["']"""
+_SRC_ATTR_PATTERN = r"""\ssrc\s*=\s*(["'])(.*?)\1"""
+_VOD_HEADER_PATTERN = r"""<div\b[^>]*\sid\s*=\s*["']vod_header["']"""
+
+# The scan patterns match either a skipped span or the wanted tag (group "tag")
+_SOURCE_SCAN_PATTERN = f"{_SKIPPED_PATTERN}|(?P<tag>{_SOURCE_TAG_PATTERN})"
+_VOD_HEADER_SCAN_PATTERN = f"{_SKIPPED_PATTERN}|(?P<tag>{_VOD_HEADER_PATTERN})"
+
+_SKIPPED_RE = re.compile(_SKIPPED_PATTERN, re.I | re.S)
+_SOURCE_SCAN_RE = re.compile(_SOURCE_SCAN_PATTERN, re.I | re.S)
+_M3U8_TYPE_RE = re.compile(_M3U8_TYPE_PATTERN, re.I)
+_SRC_ATTR_RE = re.compile(_SRC_ATTR_PATTERN, re.I | re.S)
+_VOD_HEADER_SCAN_RE = re.compile(_VOD_HEADER_SCAN_PATTERN, re.I | re.S)
+
+# Bytes versions of the same patterns, for scanning uploads before decoding
+_SOURCE_SCAN_BYTES_RE = re.compile(_SOURCE_SCAN_PATTERN.encode(), re.I | re.S)
+_M3U8_TYPE_BYTES_RE = re.compile(_M3U8_TYPE_PATTERN.encode(), re.I)
+_SRC_ATTR_BYTES_RE = re.compile(_SRC_ATTR_PATTERN.encode(), re.I | re.S)
+_VOD_HEADER_SCAN_BYTES_RE = re.compile(_VOD_HEADER_SCAN_PATTERN.encode(), re.I | re.S)
+
+# How far back a resumed scan starts, so a tag split across two reads is found
+_SCAN_OVERLAP = 4096
+
+# Characters not allowed in Windows filenames -> full-width look-alikes
+_FILENAME_TRANSLATION = str.maketrans('\\/:*?"<>|', "＼／：＊？＂＜＞｜")
 
 # Accept both 'YYYY-MM-DD HH:MM:SS' and 'YYYY-MM-DD HH:MM'
 _DATETIME_PATTERNS = [
@@ -53,7 +98,7 @@ def parse_course_activities(html: str) -> List[Activity]:
 
     Supports 'vod' (동영상) and 'assign' (과제) modules. Others are ignored for now.
     """
-    soup = BeautifulSoup(html, "html.parser")
+    soup = BeautifulSoup(html, HTML_PARSER)
     activities: list[Activity] = []
     seen_ids: set[int] = set()
 
@@ -88,7 +133,7 @@ def parse_course_activities(html: str) -> List[Activity]:
         # Clone the span and remove any child with class accesshide
         title = span_name.get_text(strip=True)
         # Remove trailing '동영상' or '과제' word that came from accesshide span.
-        title = re.sub(r"\s*(동영상|과제)$", "", title)
+        title = _TITLE_SUFFIX_RE.sub("", title)
 
         # Completion status: check for <img ... src="...completion-auto-y.svg"> existing inside .autocompletion
         completed = False
@@ -150,7 +195,7 @@ def parse_assignment_detail(html: str) -> dict:
         grading_status : str | None
         due_time : datetime | None
     """
-    soup = BeautifulSoup(html, "html.parser")
+    soup = BeautifulSoup(html, HTML_PARSER)
     info = {
         "submitted": None,
         "submission_status": None,
@@ -181,7 +226,7 @@ def parse_assignment_detail(html: str) -> dict:
 
 def parse_dashboard_courses(html: str) -> List[dict]:
     """Parse main dashboard page and return list of courses with `id`, `name`."""
-    soup = BeautifulSoup(html, "html.parser")
+    soup = BeautifulSoup(html, HTML_PARSER)
     courses = []
     select = soup.select_one("select.form-control-my-activity-course")
     if not select:
@@ -191,4 +236,112 @@ def parse_dashboard_courses(html: str) -> List[dict]:
         if not value.isdigit():
             continue  # skip placeholder '강좌를 선택하세요.' etc.
         courses.append({"id": int(value), "name": opt.get_text(strip=True)})
-    return courses 
\ No newline at end of file
+    return courses 
+
+
+def _scan_tag(text, pos, scan_re, accept):
+    """Return ``(value, at)`` for the first tag outside comments and raw-text elements.
+
+    *scan_re* is one of the ``*_SCAN_RE`` patterns and *accept* maps the tag text
+    to a value, or None to keep looking.  On a hit *at* is the tag's offset.
+    Otherwise it is where to resume once more data is appended to *text*: the
+    start of a comment or raw-text element that may not be closed yet, or else
+    ``_SCAN_OVERLAP`` before the end.
+    """
+    resume = pos
+    for m in scan_re.finditer(text, pos):
+        tag = m.group("tag")
+        if tag is None:
+            if m.end() == len(text):
+                return None, m.start()
+        else:
+            value = accept(tag)
+            if value is not None:
+                return value, m.start()
+        resume = m.end()
+    return None, max(resume, len(text) - _SCAN_OVERLAP)
+
+
+def _m3u8_src(tag):
+    """Return the non-empty ``src`` of an m3u8 ``<source>`` tag (str or bytes), else None."""
+    if isinstance(tag, bytes):
+        type_re, src_re = _M3U8_TYPE_BYTES_RE, _SRC_ATTR_BYTES_RE
+    else:
+        type_re, src_re = _M3U8_TYPE_RE, _SRC_ATTR_RE
+    if type_re.search(tag):
+        src = src_re.search(tag)
+        if src and src.group(2):
+            return src.group(2)
+    return None
+
+
+def _accept_any(tag):
+    """Accept every matched tag (for `_scan_tag`)."""
+    return tag
+
+
+def strip_unparsed(html: str) -> str:
+    """Remove comments and ``<script>``/``<style>``/``<textarea>`` elements from *html*.
+
+    What remains is the markup an HTML parser would turn into tags, so regex
+    scans over it don't pick up commented-out or scripted copies.
+    """
+    return _SKIPPED_RE.sub("", html)
+
+
+def find_m3u8_url(html: str) -> Optional[str]:
+    """Return the ``src`` of the first ``<source type="application/x-mpegURL">`` tag.
+
+    The tag is located with a regex scan so that no DOM has to be built for a
+    single attribute; like the parser, the scan ignores comments and scripts.
+    BeautifulSoup is only consulted if the scan finds nothing.
+    """
+    src, _ = _scan_tag(html, 0, _SOURCE_SCAN_RE, _m3u8_src)
+    if src:
+        return unescape(src)
+
+    soup = BeautifulSoup(html, HTML_PARSER)
+    source_tag = soup.find("source", {"type": "application/x-mpegURL"})
+    if source_tag is None or not source_tag.get("src"):
+        return None
+    return source_tag["src"]
+
+
+def parse_video_title(html: str) -> Optional[str]:
+    """Return the video title (``div#vod_header h1`` without spans), filename-safe.
+
+    Only the fragment between the header ``<div>`` and the following ``</h1>`` is
+    parsed.  Returns None if the page has no such header.
+    """
+    found, start = _scan_tag(html, 0, _VOD_HEADER_SCAN_RE, _accept_any)
+    if found is None:
+        return None
+    end = html.find("</h1>", start)
+    fragment = html[start:end + len("</h1>")] if end != -1 else html[start:]
+
+    header_div = BeautifulSoup(fragment, HTML_PARSER).find("div", id="vod_header")
+    if header_div is None or header_div.find("h1") is None:
+        return None
+    h1 = header_div.find("h1")
+    for span in h1.find_all("span"):
+        span.decompose()
+    return h1.get_text(strip=True).translate(_FILENAME_TRANSLATION)
+
+
+def scan_m3u8_source(data: bytes, pos: int = 0) -> Tuple[bool, int]:
+    """Look in *data* from *pos* for a tag `find_m3u8_url` would accept.
+
+    Returns ``(found, at)``: the tag's offset if found, else the *pos* to pass
+    once more data has been appended.
+    """
+    src, at = _scan_tag(data, pos, _SOURCE_SCAN_BYTES_RE, _m3u8_src)
+    return src is not None, at
+
+
+def scan_vod_header(data: bytes, pos: int = 0) -> Tuple[bool, int]:
+    """Look in *data* from *pos* for the ``#vod_header`` div `parse_video_title` reads.
+
+    Returns ``(found, at)`` like `scan_m3u8_source`.
+    """
+    tag, at = _scan_tag(data, pos, _VOD_HEADER_SCAN_BYTES_RE, _accept_any)
+    return tag is not None, at